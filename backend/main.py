@@ -4,35 +4,49 @@ Connects frontend to OpenAI Realtime API via WebSocket
 """
 
 import os
-import json
+import re
+import ssl
+import socket
 import asyncio
 import base64
+from binascii import a2b_base64
+from collections import deque
 from typing import Optional
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 import aiohttp
+import orjson
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging. Records are enqueued on the event-loop thread and
+# formatted/written by a background listener thread, so stderr I/O never
+# stalls audio forwarding. The QueueHandler is added by hand and left
+# unformatted: basicConfig would attach its formatter to it and every
+# line would come out double-prefixed once the listener formats it too.
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_stream_handler = logging.StreamHandler()
+_stream_handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+_log_listener = QueueListener(_log_queue, _stream_handler)
+_root_logger = logging.getLogger()
+_root_logger.setLevel(logging.INFO)
+_root_logger.addHandler(QueueHandler(_log_queue))
 logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
 app = FastAPI(title="Virtual Biographer API")
 
-# Configure CORS for frontend connection
+# Configure CORS for frontend connection. CORSMiddleware does exact
+# string matching on allow_origins, so wildcard subdomains like
+# "https://*.vercel.app" must go through allow_origin_regex instead.
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[
-        "http://localhost:5173", 
-        "http://localhost:3000",
-        "https://*.vercel.app",
-        "https://*.railway.app"
-    ],
+    allow_origin_regex=r"^https?://(localhost:(5173|3000)|[\w.-]+\.(vercel|railway)\.app)$",
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -43,6 +57,59 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 REALTIME_MODEL = os.getenv("REALTIME_MODEL", "gpt-4o-realtime-preview-2024-10-01")
 VOICE = os.getenv("VOICE", "alloy")
 
+# Shared SSL context and HTTP session for OpenAI connections.
+# Building the SSL context (certificate loading) is expensive, so do it
+# once at import instead of per WebSocket connection.
+_SSL_CONTEXT = ssl.create_default_context()
+# aiohttp only speaks HTTP/1.1, so don't advertise h2 in ALPN
+_SSL_CONTEXT.set_alpn_protocols(["http/1.1"])
+# Allow TLS session tickets so reconnects resume with a 1-RTT handshake
+_SSL_CONTEXT.options &= ~ssl.OP_NO_TICKET
+openai_http_session: Optional[aiohttp.ClientSession] = None
+
+
+@app.on_event("startup")
+async def start_log_listener():
+    """Start the background thread that drains the logging queue"""
+    _log_listener.start()
+
+
+@app.on_event("shutdown")
+async def stop_log_listener():
+    """Flush and stop the logging listener thread"""
+    _log_listener.stop()
+
+
+@app.on_event("startup")
+async def create_http_session():
+    """Create the shared aiohttp session used for all OpenAI connections"""
+    global openai_http_session
+    # Warm the resolver that the connector will use so the first
+    # interview doesn't pay for the api.openai.com lookup
+    resolver = aiohttp.AsyncResolver()
+    try:
+        await resolver.resolve("api.openai.com", 443)
+    except OSError:
+        pass
+    openai_http_session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(
+            limit=0,
+            limit_per_host=64,
+            resolver=resolver,
+            ttl_dns_cache=600,
+            keepalive_timeout=75,
+            enable_cleanup_closed=True,
+            ssl=_SSL_CONTEXT,
+        )
+    )
+
+
+@app.on_event("shutdown")
+async def close_http_session():
+    """Close the shared aiohttp session"""
+    if openai_http_session:
+        await openai_http_session.close()
+
 # Interviewer System Prompt (hardcoded for MVP)
 INTERVIEWER_PROMPT = """##
 TASK
@@ -165,15 +232,146 @@ STAGE 4: Saying Goodbye
  
  - Say you hope you get to talk again soon and say goodbye!"""
 
+# session.update payload, serialized once at import. The prompt is static
+# and VOICE/REALTIME_MODEL are frozen from the environment at startup, so
+# there's no need to rebuild and re-encode this 5 KB dict per session.
+# Kept as str: the Realtime API defines events as JSON in text frames.
+_SESSION_UPDATE_JSON = orjson.dumps({
+    "type": "session.update",
+    "session": {
+        "modalities": ["text", "audio"],
+        "instructions": INTERVIEWER_PROMPT,
+        "voice": VOICE,
+        "input_audio_format": "pcm16",
+        "output_audio_format": "pcm16",
+        "input_audio_transcription": {
+            "model": "whisper-1"
+        },
+        # Turn detection runs client-side: the browser's VAD only streams
+        # audio during speech and ends each turn with an explicit
+        # input_audio_buffer.commit, so silence never crosses the relay
+        "turn_detection": None
+    }
+}).decode()
+
+
+# Binary frames on the client leg carry raw PCM16 with a 1-byte type
+# prefix, avoiding the 33% base64 inflation and per-frame JSON parse of
+# the Realtime API's text encoding. Frame types understood by the client:
+_BINARY_AUDIO_PREFIX = b"\x01"
+
+# Matches the base64 payload of a response.audio.delta event so the audio
+# can be pulled out of the raw frame without a full JSON parse
+_AUDIO_DELTA_RE = re.compile(rb'"delta"\s*:\s*"([^"]+)"')
+
+# Per-direction frame queue depth. Bounds the memory a slow peer can
+# pin per session; at ~50 audio frames/sec this is just over a second
+# of buffered audio before old deltas start getting dropped.
+_QUEUE_MAXSIZE = 64
+
+# Prebuilt JSON fragments for the input_audio_buffer.append event; the
+# base64 payload never needs escaping, so the frame is pure concatenation
+_APPEND_PREFIX = '{"type":"input_audio_buffer.append","audio":"'
+_APPEND_SUFFIX = '"}'
+
+
+def _wrap_input_audio(pcm: bytes) -> str:
+    """Build an input_audio_buffer.append frame around raw PCM16.
+
+    b64encode, the ascii decode and the concatenation all run in C, and
+    the result is a str ready for the text frame the Realtime API
+    expects.
+    """
+    return _APPEND_PREFIX + base64.b64encode(pcm).decode("ascii") + _APPEND_SUFFIX
+
+
+def _repack_delta_to_binary(buf: bytes) -> Optional[bytes]:
+    """Repack a response.audio.delta frame as a prefixed binary frame.
+
+    Regex extraction and a2b_base64 both run in C. Returns None when the
+    frame carries no recognizable payload so the caller can fall back to
+    forwarding the original frame.
+    """
+    match = _AUDIO_DELTA_RE.search(buf)
+    if match is None:
+        return None
+    return _BINARY_AUDIO_PREFIX + a2b_base64(match.group(1))
+
+
+class _FrameQueue:
+    """FIFO frame buffer whose eviction policy only ever sheds audio.
+
+    Frames are delivered in arrival order. When the buffer is full, the
+    oldest droppable (audio) frame is evicted to make room - playing
+    stale audio late is worse than a brief dropout - but control events
+    are never evicted: losing an input_audio_buffer.commit or
+    response.create would hang the turn permanently, and losing
+    response.done would strand the client UI.
+    """
+
+    __slots__ = ("_items", "_ready")
+
+    def __init__(self):
+        self._items: deque = deque()
+        self._ready = asyncio.Event()
+
+    def put(self, payload, droppable: bool):
+        """Append a frame, shedding the oldest audio frame when full"""
+        if len(self._items) >= _QUEUE_MAXSIZE:
+            for item in self._items:
+                if item[1]:
+                    self._items.remove(item)
+                    break
+            else:
+                # Nothing but control frames queued: shed the incoming
+                # frame if it's audio, otherwise exceed the soft bound
+                if droppable:
+                    return
+        self._items.append((payload, droppable))
+        self._ready.set()
+
+    async def get(self):
+        """Return the oldest (payload, droppable) pair, waiting if empty"""
+        while not self._items:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._items.popleft()
+
+
+def _peek_type(frame: bytes) -> bytes:
+    """Extract the event "type" from a raw frame without JSON-parsing it.
+
+    The type field is a short string near the front of every Realtime API
+    event, so a couple of find() calls are far cheaper than tokenizing a
+    frame that may carry tens of KB of base64 audio.
+    """
+    i = frame.find(b'"type"')
+    if i == -1:
+        return b"unknown"
+    j = frame.find(b'"', i + 6)
+    k = frame.find(b'"', j + 1)
+    return frame[j + 1:k]
+
 
 class RealtimeSession:
     """Manages a single Realtime API session"""
-    
+
+    # Fixed attribute layout: no per-instance __dict__, which saves
+    # ~100 B per concurrent session and keeps the attributes the
+    # forward loops touch on every frame in a compact struct
+    __slots__ = ("client_ws", "openai_ws", "_to_openai", "_to_client", "_debug")
+
     def __init__(self, client_ws: WebSocket):
         self.client_ws = client_ws
         self.openai_ws: Optional[aiohttp.ClientWebSocketResponse] = None
-        self.session_active = False
-        
+        # Bounded queues decouple reading one socket from writing the
+        # other; see _FrameQueue for the audio-only overflow policy
+        self._to_openai = _FrameQueue()
+        self._to_client = _FrameQueue()
+        # Snapshot the debug level once; isEnabledFor costs attribute and
+        # dict lookups we don't want on every frame of the forward loops
+        self._debug = logger.isEnabledFor(logging.DEBUG)
+
     async def connect_to_openai(self):
         """Establish WebSocket connection to OpenAI Realtime API"""
         url = f"wss://api.openai.com/v1/realtime?model={REALTIME_MODEL}"
@@ -182,107 +380,147 @@ class RealtimeSession:
             "OpenAI-Beta": "realtime=v1"
         }
         
-        session = aiohttp.ClientSession()
         try:
-            self.openai_ws = await session.ws_connect(url, headers=headers)
+            # compress=0 disables permessage-deflate on this leg: OpenAI
+            # sends audio uncompressed and the relay is CPU-bound here
+            self.openai_ws = await openai_http_session.ws_connect(
+                url, headers=headers, heartbeat=20, compress=0
+            )
+            self._tune_openai_socket()
             logger.info("Connected to OpenAI Realtime API")
-            return session
         except Exception as e:
             logger.error(f"Failed to connect to OpenAI: {e}")
-            await session.close()
             raise
     
+    def _tune_openai_socket(self):
+        """Set TCP options on the upstream socket for low-latency audio.
+
+        Disable Nagle so small audio deltas aren't coalesced into larger
+        packets, and turn on TCP keepalive so a dead peer is noticed in
+        seconds rather than the kernel's 2-hour default. Reaching the
+        socket goes through aiohttp internals, so failures are logged
+        and otherwise ignored.
+        """
+        try:
+            transport = self.openai_ws._response.connection.transport
+            sock = transport.get_extra_info("socket")
+            if sock is None:
+                return
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            if hasattr(socket, "TCP_KEEPIDLE"):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 30)
+        except (AttributeError, OSError) as e:
+            logger.warning(f"Could not tune OpenAI socket: {e}")
+
     async def configure_session(self):
         """Send session configuration to OpenAI"""
-        config = {
-            "type": "session.update",
-            "session": {
-                "modalities": ["text", "audio"],
-                "instructions": INTERVIEWER_PROMPT,
-                "voice": VOICE,
-                "input_audio_format": "pcm16",
-                "output_audio_format": "pcm16",
-                "input_audio_transcription": {
-                    "model": "whisper-1"
-                },
-                "turn_detection": {
-                    "type": "server_vad",
-                    "threshold": 0.5,
-                    "prefix_padding_ms": 300,
-                    "silence_duration_ms": 500
-                }
-            }
-        }
-        await self.openai_ws.send_json(config)
+        await self.openai_ws.send_str(_SESSION_UPDATE_JSON)
         logger.info("Session configured")
     
     async def forward_client_to_openai(self):
-        """Forward messages from frontend client to OpenAI"""
-        try:
-            while self.session_active:
-                message = await self.client_ws.receive_text()
-                data = json.loads(message)
-                
-                # Forward to OpenAI
-                await self.openai_ws.send_json(data)
-                logger.debug(f"Client -> OpenAI: {data.get('type', 'unknown')}")
-                
-        except WebSocketDisconnect:
-            logger.info("Client disconnected")
-            self.session_active = False
-        except Exception as e:
-            logger.error(f"Error forwarding client message: {e}")
-            self.session_active = False
-    
+        """Read client frames and queue them for the OpenAI writer"""
+        while True:
+            message = await self.client_ws.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+
+            if message.get("bytes") is not None:
+                # Binary frame: raw PCM16 from the client's microphone.
+                # Queue it raw; the writer wraps it in the append event,
+                # so frames dropped under backpressure are never encoded
+                self._to_openai.put(message["bytes"], droppable=True)
+                if self._debug:
+                    logger.debug("Client -> OpenAI: input_audio_buffer.append")
+            else:
+                # Control/text event; never dropped
+                text = message["text"]
+                self._to_openai.put(text, droppable=False)
+                if self._debug:
+                    logger.debug(f"Client -> OpenAI: {_peek_type(text.encode()).decode()}")
+
+    async def send_to_openai(self):
+        """Drain the outbound queue into the OpenAI socket"""
+        while True:
+            payload, is_audio = await self._to_openai.get()
+            if is_audio:
+                await self.openai_ws.send_str(_wrap_input_audio(payload))
+            else:
+                await self.openai_ws.send_str(payload)
+
     async def forward_openai_to_client(self):
-        """Forward messages from OpenAI to frontend client"""
-        try:
-            async for msg in self.openai_ws:
-                if msg.type == aiohttp.WSMsgType.TEXT:
-                    data = json.loads(msg.data)
-                    
-                    # Forward to client
-                    await self.client_ws.send_text(msg.data)
-                    logger.debug(f"OpenAI -> Client: {data.get('type', 'unknown')}")
-                    
-                elif msg.type == aiohttp.WSMsgType.ERROR:
-                    logger.error(f"OpenAI WebSocket error: {self.openai_ws.exception()}")
-                    break
-                    
-        except Exception as e:
-            logger.error(f"Error forwarding OpenAI message: {e}")
-        finally:
-            self.session_active = False
-    
+        """Read OpenAI events and queue them for the client writer"""
+        async for msg in self.openai_ws:
+            if msg.type in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+                # Normalize to bytes once; BINARY frames skip the str
+                # round-trip entirely and everything downstream (type
+                # peek, regex, client send) works on the same buffer
+                raw = msg.data if isinstance(msg.data, (bytes, bytearray)) else msg.data.encode()
+                event_type = _peek_type(raw)
+                frame = None
+                if event_type == b"response.audio.delta":
+                    # Repack to a prefixed binary frame for the client
+                    frame = _repack_delta_to_binary(raw)
+                if frame is not None:
+                    self._to_client.put(frame, droppable=True)
+                else:
+                    # Control events are never dropped; the client
+                    # decodes binary JSON frames with a TextDecoder
+                    self._to_client.put(raw, droppable=False)
+                if self._debug:
+                    logger.debug(f"OpenAI -> Client: {event_type.decode()}")
+
+            elif msg.type == aiohttp.WSMsgType.ERROR:
+                raise ConnectionError(
+                    f"OpenAI WebSocket error: {self.openai_ws.exception()}"
+                )
+
+        # OpenAI closed the socket; raise so the TaskGroup cancels the
+        # client reader instead of leaving it waiting on a dead session
+        raise ConnectionError("OpenAI closed the connection")
+
+    async def send_to_client(self):
+        """Drain the inbound queue into the client socket"""
+        while True:
+            payload, _ = await self._to_client.get()
+            await self.client_ws.send_bytes(payload)
+
     async def start(self):
         """Start the relay session"""
-        session = None
         try:
             # Connect to OpenAI
-            session = await self.connect_to_openai()
-            
+            await self.connect_to_openai()
+
             # Configure the session
             await self.configure_session()
-            
-            # Start bidirectional forwarding
-            self.session_active = True
-            await asyncio.gather(
-                self.forward_client_to_openai(),
-                self.forward_openai_to_client()
-            )
-            
-        except Exception as e:
-            logger.error(f"Session error: {e}")
-            await self.client_ws.send_json({
-                "type": "error",
-                "error": str(e)
-            })
+
+            # Start bidirectional forwarding; when either side raises,
+            # the TaskGroup cancels the sibling task immediately
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(self.forward_client_to_openai())
+                tg.create_task(self.send_to_openai())
+                tg.create_task(self.forward_openai_to_client())
+                tg.create_task(self.send_to_client())
+
+        except* WebSocketDisconnect:
+            logger.info("Client disconnected")
+        except* ConnectionError as eg:
+            for exc in eg.exceptions:
+                logger.info(str(exc))
+        except* Exception as eg:
+            for exc in eg.exceptions:
+                logger.error(f"Session error: {exc}")
+            try:
+                await self.client_ws.send_json({
+                    "type": "error",
+                    "error": str(eg.exceptions[0])
+                })
+            except Exception:
+                pass
         finally:
             # Cleanup
             if self.openai_ws:
                 await self.openai_ws.close()
-            if session:
-                await session.close()
             logger.info("Session ended")
 
 
@@ -318,6 +556,20 @@ if __name__ == "__main__":
     
     host = os.getenv("HOST", "localhost")
     port = int(os.getenv("PORT", 8000))
-    
-    logger.info(f"Starting Virtual Biographer API on {host}:{port}")
-    uvicorn.run(app, host=host, port=port)
+    # I/O-bound relay: run more workers than cores so the JSON/base64
+    # work isn't serialized behind one GIL. Uvicorn enables SO_REUSEPORT
+    # under workers>1 so the kernel balances connections across them.
+    workers = int(os.getenv("WEB_CONCURRENCY", (os.cpu_count() or 1) * 2))
+
+    logger.info(f"Starting Virtual Biographer API on {host}:{port} with {workers} workers")
+    uvicorn.run(
+        "main:app",  # import string required for workers > 1
+        host=host,
+        port=port,
+        workers=workers,
+        loop="uvloop",
+        http="httptools",
+        ws="websockets",
+        # Keep deflate on the client leg: bandwidth-bound mobile clients
+        ws_per_message_deflate=True,
+    )
@@ -80,8 +80,23 @@ function App() {
   // Handle WebSocket messages from backend
   const handleWebSocketMessage = (event: MessageEvent) => {
     try {
-      const data = JSON.parse(event.data);
-      
+      // Binary frames with a 0x01 prefix carry raw PCM16 audio; other
+      // binary frames are relayed JSON events, as is any text frame
+      let data;
+      if (event.data instanceof ArrayBuffer) {
+        const bytes = new Uint8Array(event.data);
+        if (bytes[0] === 0x01) {
+          // Copy past the prefix byte so the Int16Array view is aligned
+          const int16Array = new Int16Array(event.data.slice(1));
+          audioQueueRef.current.push(int16Array);
+          processAudioQueue();
+          return;
+        }
+        data = JSON.parse(new TextDecoder().decode(bytes));
+      } else {
+        data = JSON.parse(event.data);
+      }
+
       // Log ALL messages for debugging
       console.log('📨 Received:', data.type, data);
 
@@ -91,18 +106,6 @@ function App() {
           console.log('✅ Session configured');
           break;
 
-        case 'response.audio.delta':
-          if (data.delta) {
-            console.log('🔊 Receiving audio chunk, length:', data.delta.length);
-            // Decode base64 audio
-            const audioData = Uint8Array.from(atob(data.delta), c => c.charCodeAt(0));
-            const int16Array = new Int16Array(audioData.buffer);
-            audioQueueRef.current.push(int16Array);
-            console.log('📊 Audio queue length:', audioQueueRef.current.length);
-            processAudioQueue();
-          }
-          break;
-
         case 'response.audio.done':
           console.log('✅ Response complete');
           break;
@@ -148,6 +151,7 @@ function App() {
 
       // Connect to backend WebSocket
       const ws = new WebSocket('wss://interviewer-production-48c3.up.railway.app/ws');
+      ws.binaryType = 'arraybuffer';
       wsRef.current = ws;
 
       ws.onopen = () => {
@@ -188,6 +192,14 @@ function App() {
     }
   };
 
+  // Client-side voice activity detection: only stream audio while speech
+  // is detected so silence never crosses the wire, and end each turn with
+  // an explicit commit instead of relying on server VAD. The threshold is
+  // tunable via VITE_VAD_THRESHOLD for quiet or hot microphones.
+  const VAD_THRESHOLD = Number(import.meta.env.VITE_VAD_THRESHOLD) || 0.01;
+  const VAD_HANGOVER_MS = 500;   // keep streaming this long after speech
+  const VAD_PREROLL_CHUNKS = 2;  // ~340 ms kept from before speech onset
+
   // Stream audio from microphone
   const startAudioStreaming = (stream: MediaStream, ws: WebSocket) => {
     const audioContext = new AudioContext({ sampleRate: 24000 });
@@ -197,10 +209,26 @@ function App() {
     source.connect(processor);
     processor.connect(audioContext.destination);
 
+    let speaking = false;
+    let lastVoiceTime = 0;
+    // Ring buffer of the most recent silent chunks, flushed when speech
+    // starts so quiet onsets aren't clipped (the server VAD's
+    // prefix_padding_ms served the same purpose)
+    const preRoll: ArrayBuffer[] = [];
+
     processor.onaudioprocess = (e) => {
       if (ws.readyState !== WebSocket.OPEN) return;
 
       const inputData = e.inputBuffer.getChannelData(0);
+
+      // Simple energy-based VAD
+      let sum = 0;
+      for (let i = 0; i < inputData.length; i++) {
+        sum += inputData[i] * inputData[i];
+      }
+      const rms = Math.sqrt(sum / inputData.length);
+      const now = performance.now();
+
       const int16Data = new Int16Array(inputData.length);
 
       // Convert Float32 to Int16
@@ -209,12 +237,39 @@ function App() {
         int16Data[i] = s < 0 ? s * 0x8000 : s * 0x7FFF;
       }
 
-      // Send to backend
-      const base64Audio = btoa(String.fromCharCode(...new Uint8Array(int16Data.buffer)));
-      ws.send(JSON.stringify({
-        type: 'input_audio_buffer.append',
-        audio: base64Audio
-      }));
+      if (rms >= VAD_THRESHOLD) {
+        lastVoiceTime = now;
+        if (!speaking) {
+          speaking = true;
+          setConversationState('listening');
+          console.log('🎤 Speech started');
+          // Flush the pre-roll so the start of the utterance is kept
+          for (const buffer of preRoll) {
+            ws.send(buffer);
+          }
+          preRoll.length = 0;
+        }
+      } else if (speaking && now - lastVoiceTime > VAD_HANGOVER_MS) {
+        // End of turn: commit the buffered audio and request a response
+        speaking = false;
+        ws.send(JSON.stringify({ type: 'input_audio_buffer.commit' }));
+        ws.send(JSON.stringify({ type: 'response.create' }));
+        setConversationState('thinking');
+        console.log('🤔 Speech stopped, committing turn');
+        return;
+      }
+
+      if (!speaking) {
+        preRoll.push(int16Data.buffer);
+        if (preRoll.length > VAD_PREROLL_CHUNKS) {
+          preRoll.shift();
+        }
+        return;
+      }
+
+      // Send raw PCM16 as a binary frame; the backend wraps it in the
+      // Realtime API's base64 append event
+      ws.send(int16Data.buffer);
     };
   };
 